@@ -7,11 +7,48 @@ Processes all PDFs from /app/input and generates JSON outputs in /app/output
 import os
 import sys
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Tuple
+
+try:
+    import orjson
+except ImportError:
+    # Fall back to the standard library encoder
+    orjson = None
 
 # Import your PDF extractor class
 from pdf_extractor import extract_pdf_structure
 
+def _process_one(path_str: str) -> Tuple[str, Dict]:
+    """Extract structure from a single PDF in a worker process"""
+    pdf_file = Path(path_str)
+    try:
+        print(f"Processing: {pdf_file.name}")
+        
+        # Extract structure using your function
+        result = extract_pdf_structure(path_str)
+        
+    except Exception as e:
+        print(f"Error processing {pdf_file.name}: {str(e)}")
+        # Create error output
+        result = {
+            "title": "Error extracting title",
+            "outline": []
+        }
+    
+    return pdf_file.stem, result
+
+def _write_json(output_path: Path, result: Dict) -> None:
+    """Serialize a result and write it with a single call"""
+    if orjson is not None:
+        buf = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+    else:
+        buf = json.dumps(result, indent=2, ensure_ascii=False).encode('utf-8')
+    output_path.write_bytes(buf)
+    print(f"Generated: {output_path.name}")
+
 def main():
     input_dir = Path("/app/input")
     output_dir = Path("/app/output")
@@ -33,38 +70,27 @@ def main():
     
     print(f"Found {len(pdf_files)} PDF files to process")
     
-    # Process each PDF file
-    for pdf_file in pdf_files:
-        try:
-            print(f"Processing: {pdf_file.name}")
-            
-            # Extract structure using your function
-            result = extract_pdf_structure(str(pdf_file))
-            
+    # Process PDF files in parallel; JSON writing stays in the parent and is
+    # handed to a small thread pool so it overlaps with extraction
+    paths = [str(p) for p in pdf_files]
+    max_workers = min(os.cpu_count() or 1, len(pdf_files))
+    
+    writes = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+            ThreadPoolExecutor(max_workers=2) as io_exec:
+        for stem, result in executor.map(_process_one, paths, chunksize=1):
             # Create output filename (replace .pdf with .json)
-            output_filename = pdf_file.stem + ".json"
-            output_path = output_dir / output_filename
+            output_path = output_dir / (stem + ".json")
             
             # Write result to JSON file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            
-            print(f"Generated: {output_filename}")
-            
-        except Exception as e:
-            print(f"Error processing {pdf_file.name}: {str(e)}")
-            # Create error output
-            error_result = {
-                "title": "Error extracting title",
-                "outline": []
-            }
-            output_filename = pdf_file.stem + ".json"
-            output_path = output_dir / output_filename
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(error_result, f, indent=2)
+            writes.append(io_exec.submit(_write_json, output_path, result))
+    
+    # Surface any write errors
+    for write in writes:
+        write.result()
     
     print("Processing complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.set_start_method("forkserver")
+    main()
@@ -1,21 +1,38 @@
-import PyPDF2
 import fitz  # PyMuPDF
 import re
-import json
-from typing import Dict, List, Tuple
-import statistics
-from collections import Counter
-import nltk
-from nltk.corpus import stopwords
+from typing import Dict, Iterator, List, Optional
+from collections import defaultdict
+from functools import lru_cache
+
+# Default "dict" extraction flags minus image blocks, which are never used
+_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Heading patterns fused into one regex; the matching named group gives
+# the level ("h2" is H2, everything else is H1)
+_HEADING_RE = re.compile(
+    r'^(?P<h2>\d+\.\d+\s+[A-Z][^.]*)$'  # "2.1 Intended Audience"
+    r'|^(?P<h1num>\d+\.\s+[A-Z][^.]*)$'  # "1. Introduction to..."
+    r'|^(?P<named>Revision History|Table of Contents|Acknowledgements|Abstract'
+    r'|Introduction|Conclusion|Summary|(?:\d+\s+)?References|Bibliography'
+    r'|Appendix)\s*$'
+    r'|^(?P<chap>Chapter\s+\d+|Section\s+\d+)',  # Chapter/section headings
+    re.IGNORECASE
+)
+
+# Obvious non-heading exclusions, fused into a single alternation:
+# bare numbers, page numbers, copyright, URLs, version numbers, emails
+_EXCLUSION_RE = re.compile(
+    r'^\d+$|page\s+\d+|©.*copyright|www\.|version\s+\d+|email|@|https?://',
+    re.IGNORECASE
+)
+
+# Phrases that mark a line as part of the document title
+_TITLE_HINTS = ('overview', 'foundation', 'extension', 'level', 'introduction', 'guide', 'manual')
+
+# Periods inside abbreviations ("e.g", "U.S")
+_ABBREVIATION_RE = re.compile(r'\w\.\w')
 
 class PDFStructureExtractor:
-    def __init__(self):
-        try:
-            self.stop_words = set(stopwords.words('english'))
-        except LookupError:
-            # If stopwords not available, use empty set
-            self.stop_words = set()
-        
     def extract_structure(self, pdf_path: str) -> Dict:
         """
         Main function to extract title and heading structure from PDF
@@ -24,21 +41,21 @@ class PDFStructureExtractor:
             # Open PDF with PyMuPDF for better font and formatting analysis
             doc = fitz.open(pdf_path)
             
-            # Extract text with formatting information
+            # Extract text with formatting information, one page at a time,
+            # building the font size histogram as lines come in
             pages_data = []
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                blocks = page.get_text("dict")
-                pages_data.append({
-                    'page_num': page_num + 1,
-                    'blocks': blocks,
-                    'text_lines': self._extract_formatted_lines(blocks)
-                })
+            size_hist = defaultdict(int)
+            for page_data in self._iter_pages(doc):
+                pages_data.append(page_data)
+                for line in page_data['text_lines']:
+                    # Skip very short lines and likely non-content
+                    if len(line['text']) > 3:
+                        size_hist[round(line['avg_font_size'], 1)] += 1
             
             doc.close()
             
             # Analyze font characteristics across the document
-            font_stats = self._analyze_font_characteristics(pages_data)
+            font_stats = self._analyze_font_characteristics(size_hist)
             
             # Extract title from first page with improved logic
             title = self._extract_title_improved(pages_data[0], font_stats)
@@ -58,6 +75,16 @@ class PDFStructureExtractor:
                 "outline": []
             }
     
+    def _iter_pages(self, doc) -> Iterator[Dict]:
+        """Yield formatted lines page by page, dropping the raw block dicts"""
+        for page_num in range(len(doc)):
+            page = doc.load_page(page_num)
+            blocks = page.get_text("dict", flags=_TEXT_FLAGS)
+            yield {
+                'page_num': page_num + 1,
+                'text_lines': self._extract_formatted_lines(blocks)
+            }
+    
     def _extract_formatted_lines(self, blocks: Dict) -> List[Dict]:
         """Extract text lines with formatting information"""
         lines = []
@@ -65,51 +92,43 @@ class PDFStructureExtractor:
         for block in blocks.get('blocks', []):
             if block.get('type') == 0:  # Text block
                 for line in block.get('lines', []):
-                    line_text = ""
-                    font_sizes = []
-                    font_flags = []
-                    font_names = []
+                    # Single pass over spans with running aggregates
+                    parts = []
+                    size_sum = 0.0
+                    size_max = 0.0
+                    n = 0
+                    flag_union = 0
                     
-                    for span in line.get('spans', []):
-                        line_text += span.get('text', '')
-                        font_sizes.append(span.get('size', 12))
-                        font_flags.append(span.get('flags', 0))
-                        font_names.append(span.get('font', ''))
+                    for span in line.get('spans', ()):
+                        size = span.get('size', 12.0)
+                        parts.append(span.get('text', ''))
+                        size_sum += size
+                        if size > size_max:
+                            size_max = size
+                        n += 1
+                        flag_union |= span.get('flags', 0)  # OR of all span flags
                     
-                    if line_text.strip():
-                        avg_size = statistics.mean(font_sizes) if font_sizes else 12
+                    line_text = ''.join(parts).strip()
+                    if line_text:
                         lines.append({
-                            'text': line_text.strip(),
+                            'text': line_text,
+                            'text_lower': line_text.lower(),  # Lowercased once for all checks
                             'bbox': line.get('bbox', [0, 0, 0, 0]),
-                            'font_sizes': font_sizes,
-                            'font_flags': font_flags,
-                            'font_names': font_names,
-                            'avg_font_size': avg_size,
-                            'max_font_size': max(font_sizes) if font_sizes else 12,
-                            'is_bold': any(flag & 2**4 for flag in font_flags),
-                            'is_italic': any(flag & 2**6 for flag in font_flags)
+                            'avg_font_size': size_sum / n if n else 12.0,
+                            'max_font_size': size_max if n else 12.0,
+                            'is_bold': bool(flag_union & 0x10),  # Bold flag (bit 4)
+                            'is_italic': bool(flag_union & 0x40)  # Italic flag (bit 6)
                         })
         
         return lines
     
-    def _analyze_font_characteristics(self, pages_data: List[Dict]) -> Dict:
+    def _analyze_font_characteristics(self, size_hist: Dict[float, int]) -> Dict:
         """Analyze font characteristics to identify body text and heading patterns"""
-        all_font_sizes = []
-        all_lines = []
-        
-        for page_data in pages_data:
-            for line in page_data['text_lines']:
-                # Skip very short lines and likely non-content
-                if len(line['text'].strip()) > 3:
-                    all_font_sizes.append(line['avg_font_size'])
-                    all_lines.append(line)
-        
         # Find the most common font size (body text)
-        font_size_counter = Counter([round(size, 1) for size in all_font_sizes])
-        body_font_size = font_size_counter.most_common(1)[0][0] if font_size_counter else 12.0
+        body_font_size = max(size_hist.items(), key=lambda kv: kv[1])[0] if size_hist else 12.0
         
-        # Get unique font sizes sorted by frequency and size
-        unique_sizes = sorted(set([round(size, 1) for size in all_font_sizes]), reverse=True)
+        # Get unique font sizes sorted by size
+        unique_sizes = sorted(size_hist, reverse=True)
         
         # Calculate significant size differences for heading detection
         size_threshold = body_font_size + 0.5  # More sensitive threshold
@@ -117,28 +136,36 @@ class PDFStructureExtractor:
         return {
             'body_font_size': body_font_size,
             'size_threshold': size_threshold,
-            'unique_sizes': unique_sizes,
-            'all_lines': all_lines
+            'unique_sizes': unique_sizes
         }
     
     def _extract_title_improved(self, first_page_data: Dict, font_stats: Dict) -> str:
         """Extract document title with improved logic"""
         lines = first_page_data['text_lines']
         
-        # Look for title candidates in first 10 lines
-        title_candidates = []
+        # Look for title candidates in first 10 lines, tracking the best so far
+        candidates = lines[:10]
+        best_score = None
+        best_text = None
+        best_line_idx = None
         
-        for i, line in enumerate(lines[:10]):
-            text = line['text'].strip()
+        # Largest font bonus any candidate can earn, used to bound later scores
+        body_size = font_stats['body_font_size']
+        max_size = max((line['avg_font_size'] for line in candidates), default=body_size)
+        max_font_bonus = max(max_size - body_size, 0) * 5
+        
+        for i, line in enumerate(candidates):
+            text = line['text']
+            text_lower = line['text_lower']
             
             # Skip obvious non-titles
             if (not text or 
                 len(text) < 3 or 
                 text.isdigit() or 
-                'copyright' in text.lower() or
-                'version' in text.lower() or
+                'copyright' in text_lower or
+                'version' in text_lower or
                 '©' in text or
-                'page' in text.lower() and text.lower().count('page') > 0):
+                'page' in text_lower):
                 continue
             
             # Calculate title score
@@ -164,34 +191,35 @@ class PDFStructureExtractor:
                 score += 5
             
             # Special bonus for title-like phrases
-            if any(phrase in text.lower() for phrase in ['overview', 'foundation', 'extension', 'level', 'introduction', 'guide', 'manual']):
+            if any(phrase in text_lower for phrase in _TITLE_HINTS):
                 score += 20
             
-            title_candidates.append((score, text, i))
-        
-        # Sort by score and get best candidate
-        title_candidates.sort(key=lambda x: x[0], reverse=True)
-        
-        if title_candidates:
-            # Try to combine related title parts
-            best_candidate = title_candidates[0]
-            title_text = best_candidate[1]
+            # Earlier lines win ties
+            if best_score is None or score > best_score:
+                best_score, best_text, best_line_idx = score, text, i
             
-            # Look for additional title parts in nearby lines
-            best_line_idx = best_candidate[2]
-            combined_title_parts = [title_text]
+            # Stop once no remaining line can beat the best score: font bonus,
+            # bold, position, length and phrase bonuses at their maximum
+            upper_bound = max_font_bonus + 10 + max(15 - 2 * (i + 1), 0) + 15 + 20
+            if best_score >= upper_bound:
+                break
+        
+        if best_text is not None:
+            # Try to combine related title parts from nearby lines
+            combined_title_parts = [best_text]
             
             # Check line before and after for related content
             for offset in [-1, 1]:
                 check_idx = best_line_idx + offset
                 if 0 <= check_idx < len(lines):
                     check_line = lines[check_idx]
-                    check_text = check_line['text'].strip()
+                    check_text = check_line['text']
+                    check_lower = check_line['text_lower']
                     
                     # If it's a related title part (similar font size, contains key words)
                     if (check_text and 
                         abs(check_line['avg_font_size'] - lines[best_line_idx]['avg_font_size']) < 2 and
-                        any(word in check_text.lower() for word in ['overview', 'foundation', 'extension', 'level', 'introduction', 'guide', 'manual']) and
+                        any(word in check_lower for word in _TITLE_HINTS) and
                         len(check_text.split()) <= 8):
                         
                         if offset == -1:
@@ -209,130 +237,105 @@ class PDFStructureExtractor:
     def _extract_headings_improved(self, pages_data: List[Dict], font_stats: Dict) -> List[Dict]:
         """Extract headings with improved filtering"""
         headings = []
+        seen = set()  # Heading texts already added, for O(1) duplicate checks
         body_size = font_stats['body_font_size']
         
-        # Define heading patterns
-        heading_patterns = [
-            r'^(Revision History)\s*$',
-            r'^(Table of Contents)\s*$', 
-            r'^(Acknowledgements)\s*$',
-            r'^(Abstract)\s*$',
-            r'^(Introduction)\s*$',
-            r'^(Conclusion)\s*$',
-            r'^(Summary)\s*$',
-            r'^(References)\s*$',
-            r'^(Bibliography)\s*$',
-            r'^(Appendix)\s*$',
-            r'^\d+\.\s+[A-Z][^.]*$',  # "1. Introduction to..." 
-            r'^\d+\.\d+\s+[A-Z][^.]*$',  # "2.1 Intended Audience"
-            r'^\d+\s+(References)\s*$',  # "4. References"
-            r'^Chapter\s+\d+',  # Chapter headings
-            r'^Section\s+\d+',  # Section headings
-        ]
-        
         for page_data in pages_data:
             page_num = page_data['page_num']
             
             for line in page_data['text_lines']:
-                text = line['text'].strip()
-                
-                # Skip obvious non-headings
-                if not self._is_valid_heading_candidate(text, line, body_size):
-                    continue
+                text = line['text']
                 
-                # Check against patterns and font analysis
-                heading_level = None
-                is_heading = False
-                
-                # Pattern-based detection
-                for pattern in heading_patterns:
-                    if re.match(pattern, text, re.IGNORECASE):
-                        is_heading = True
-                        # Determine level based on pattern
-                        if re.match(r'^\d+\.\d+', text):
-                            heading_level = "H2"
-                        elif re.match(r'^\d+\.', text):
-                            heading_level = "H1"
-                        else:
-                            heading_level = "H1"
-                        break
-                
-                # Font-based detection for headings not caught by patterns
-                if not is_heading:
-                    # Check if font size significantly larger than body
-                    if line['avg_font_size'] > body_size + 2:
-                        is_heading = True
-                        if line['avg_font_size'] > body_size + 4:
-                            heading_level = "H1"
-                        else:
-                            heading_level = "H2"
-                    # Check for bold text with reasonable size increase
-                    elif line['is_bold'] and line['avg_font_size'] > body_size + 0.5:
-                        # Additional checks for bold headings
-                        if (len(text.split()) <= 10 and 
-                            not any(word in text.lower() for word in ['the', 'and', 'or', 'but', 'with', 'from']) and
-                            text[0].isupper()):
-                            is_heading = True
-                            heading_level = "H2"
+                heading_level = self._classify_heading(
+                    text, line['text_lower'], line['avg_font_size'], line['is_bold'], body_size
+                )
                 
                 # Add heading if valid
-                if is_heading and heading_level:
+                if heading_level:
                     clean_text = self._clean_heading_text(text)
                     
                     # Final validation
                     if (clean_text and 
                         len(clean_text) > 2 and 
-                        not self._is_duplicate_heading(clean_text, headings)):
+                        clean_text not in seen):
                         
+                        seen.add(clean_text)
                         headings.append({
                             "level": heading_level,
                             "text": clean_text,
                             "page": page_num
                         })
         
-        # Sort by page number and maintain order
-        headings.sort(key=lambda x: (x['page'], x['text']))
-        
+        # Pages and lines are visited in order, so headings are already in
+        # document order
         return headings
     
-    def _is_valid_heading_candidate(self, text: str, line: Dict, body_size: float) -> bool:
-        """Strict validation for heading candidates"""
+    def _classify_heading(self, text: str, text_lower: str, avg_size: float,
+                          is_bold: bool, body_size: float) -> Optional[str]:
+        """Return the heading level for a line, or None if it is not a heading"""
+        # Skip obvious non-headings
+        if not self._text_looks_like_heading(text):
+            return None
+        
+        # Pattern-based detection
+        heading_level = self._classify_heading_pattern(text)
+        if heading_level:
+            return heading_level
+        
+        # Font-based detection for headings not caught by patterns
+        # Check if font size significantly larger than body
+        if avg_size > body_size + 2:
+            return "H1" if avg_size > body_size + 4 else "H2"
+        
+        # Check for bold text with reasonable size increase
+        if is_bold and avg_size > body_size + 0.5:
+            # Additional checks for bold headings
+            if (len(text.split()) <= 10 and 
+                not any(word in text_lower for word in ['the', 'and', 'or', 'but', 'with', 'from']) and
+                text[0].isupper()):
+                return "H2"
+        
+        return None
+    
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _text_looks_like_heading(text: str) -> bool:
+        """Text-only heading checks, cached since headers and footers repeat across pages"""
         # Length constraints
         if len(text) < 3 or len(text) > 150:
             return False
         
         # Must not be just numbers or contain obvious exclusions
-        exclusions = [
-            r'^\d+$',  # Just numbers
-            r'page\s+\d+',  # Page numbers  
-            r'©.*copyright',  # Copyright
-            r'www\.',  # URLs
-            r'version\s+\d+',  # Version numbers
-            r'email|@',  # Email addresses
-            r'http[s]?://',  # URLs
-        ]
-        
-        for exclusion in exclusions:
-            if re.search(exclusion, text, re.IGNORECASE):
-                return False
+        if _EXCLUSION_RE.search(text):
+            return False
         
         # Avoid very long sentences that are clearly content
-        if len(text.split()) > 15:
+        word_count = len(text.split())
+        if word_count > 15:
             return False
         
-        # Avoid text that looks like regular paragraphs
-        if (text.lower().count('the ') > 2 or 
-            text.lower().count(' and ') > 1 or
-            text.endswith('.') and len(text.split()) > 8):
+        # Avoid text that looks like regular paragraphs (lowercased once per
+        # distinct text thanks to the cache)
+        text_lower = text.lower()
+        if (text_lower.count('the ') > 2 or 
+            text_lower.count(' and ') > 1 or
+            text.endswith('.') and word_count > 8):
             return False
         
         return True
     
-    def _is_duplicate_heading(self, text: str, existing_headings: List[Dict]) -> bool:
-        """Check for duplicate headings"""
-        return any(h['text'] == text for h in existing_headings)
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _classify_heading_pattern(text: str) -> Optional[str]:
+        """Return "H1"/"H2" if the text matches a heading pattern, else None"""
+        match = _HEADING_RE.match(text)
+        if not match:
+            return None
+        return "H2" if match.lastgroup == 'h2' else "H1"
     
-    def _clean_heading_text(self, text: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _clean_heading_text(text: str) -> str:
         """Clean and normalize heading text"""
         # Remove extra whitespace but preserve intentional spacing
         text = ' '.join(text.split())
@@ -341,19 +344,22 @@ class PDFStructureExtractor:
         if (len(text.split()) <= 8 and 
             not text.endswith('...') and 
             text.endswith('.') and
-            not re.search(r'\w\.\w', text)):  # Don't remove periods from abbreviations
+            not _ABBREVIATION_RE.search(text)):  # Don't remove periods from abbreviations
             text = text.rstrip('.')
         
         return text.strip()
 
 
+# Shared extractor, created once per process; it keeps no per-document state
+_EXTRACTOR = PDFStructureExtractor()
+
+
 def extract_pdf_structure(pdf_path: str) -> Dict:
     """
     Extract title and heading structure from PDF
     """
     try:
-        extractor = PDFStructureExtractor()
-        result = extractor.extract_structure(pdf_path)
+        result = _EXTRACTOR.extract_structure(pdf_path)
         return result
     
     except Exception as e: